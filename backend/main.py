@@ -1,37 +1,70 @@
-from fastapi import FastAPI, HTTPException, Request, Depends, status
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Response, Depends, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from starlette.middleware.base import BaseHTTPMiddleware
-from pydantic import BaseModel, Field, validator, EmailStr
-from typing import Optional, List, Dict
-from datetime import datetime, timedelta
-from passlib.context import CryptContext
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from fastapi.security import HTTPBearer
+from starlette.datastructures import MutableHeaders
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, TypeAdapter
+from typing import Optional, List, Dict, Tuple
+from datetime import datetime
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+import jwt
+from jwt import InvalidTokenError
+from sqlalchemy import func, case, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only, make_transient_to_detached
+from cachetools import TLRUCache, TTLCache
+import anyio
+import asyncio
+import bcrypt
+import orjson
 import time
 import logging
+import logging.handlers
+import queue
+import atexit
 import secrets
+import hashlib
+import hmac
+import base64
+import threading
 import os
 
 # Database imports
-from database import get_db, engine
+from database import get_db, engine, SessionLocal, init_db, create_missing_indexes
 import models
 
 # S3 service for profile image uploads
-from s3_service import generate_presigned_upload_url, delete_profile_image
+from s3_service import generate_presigned_upload_url, delete_profile_image, keep_s3_connection_warm
 
 # DynamoDB session storage
-from session_service import create_session, validate_session, invalidate_session, invalidate_all_user_sessions
+from session_service import (
+    create_session, validate_session, invalidate_session, invalidate_all_user_sessions,
+    keep_dynamodb_connection_warm, check_sessions_ttl
+)
 
 # ============= LOGGING CONFIGURATION =============
+# Request handlers only enqueue records; file and console writes happen on the
+# listener's background thread so a slow flush never blocks a request.
+# The log file is rotated at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT old files.
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.handlers.RotatingFileHandler('api.log', maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT),
+    logging.StreamHandler(),
+    respect_handler_level=True
+)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('api.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
@@ -40,25 +73,90 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-fallback-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_DAYS = int(os.getenv("ACCESS_TOKEN_EXPIRE_DAYS", "30"))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Username granted admin on registration; when unset, the first user to register becomes admin
+FIRST_ADMIN_USERNAME = os.getenv("FIRST_ADMIN_USERNAME")
+
+# HS256 tokens are signed directly with hmac: the header segment and key bytes never change
+_JWT_HEADER_B64 = base64.urlsafe_b64encode(orjson.dumps({"alg": "HS256", "typ": "JWT"})).rstrip(b"=")
+_JWT_SIGNING_KEY = SECRET_KEY.encode()
+
+# Worker threads for sync endpoints and offloaded CPU-bound work such as password hashing
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "100"))
+
+# Password hashing: new hashes use argon2id; existing bcrypt hashes still verify and are
+# upgraded on the next successful login. The argon2 cost can be calibrated per deployment;
+# hashes made with other parameters are likewise rehashed on the next successful login.
+password_hasher = PasswordHasher(
+    time_cost=int(os.getenv("ARGON2_TIME_COST", "2")),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", "19456")),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", "1")),
+)
 
 # JWT Bearer token
-security = HTTPBearer()
+class BearerToken(HTTPBearer):
+    """
+    HTTPBearer that returns the raw token string.
+    Skips building an HTTPAuthorizationCredentials model on every authenticated request,
+    while keeping the bearer security scheme in the OpenAPI docs.
+    """
+    async def __call__(self, request: Request) -> str:
+        authorization = request.headers.get("Authorization")
+        if not authorization:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
+        scheme, _, token = authorization.partition(" ")
+        if not token:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
+        if scheme.lower() != "bearer":
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid authentication credentials")
+        return token
+
+
+security = BearerToken(scheme_name="HTTPBearer")
+
+# Decoded JWT payloads, keyed by a BLAKE2b digest of the token so raw tokens are never held
+# in memory. Entries expire after JWT_CACHE_TTL_SECONDS or at the token's own exp, whichever
+# comes first, so an expired token can never be served from the cache.
+JWT_CACHE_TTL_SECONDS = int(os.getenv("JWT_CACHE_TTL_SECONDS", "30"))
+_jwt_cache = TLRUCache(
+    maxsize=10000,
+    ttu=lambda _key, payload, now: min(now + JWT_CACHE_TTL_SECONDS, payload.get("exp", now)),
+    timer=time.time
+)
+_jwt_cache_lock = threading.Lock()
+
+# Column snapshots of authenticated users, keyed by user ID. A cached user can be up to
+# USER_CACHE_TTL_SECONDS stale; profile updates, role changes and deletions evict explicitly.
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+_user_cache = TTLCache(maxsize=5000, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_lock = threading.Lock()
 
 
 # ============= AUTH UTILITIES =============
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    # Bcrypt has a 72-byte limit, truncate if necessary
-    if len(password.encode('utf-8')) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
+    """Hash a password using argon2id"""
+    return password_hasher.hash(password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password against its hash.
+    Returns (verified, new_hash) where new_hash is set when the stored hash
+    uses a deprecated scheme or cost and should be replaced.
+    """
+    if hashed_password.startswith("$2"):
+        # Legacy bcrypt hash (bcrypt only uses the first 72 bytes of the password)
+        if not bcrypt.checkpw(plain_password.encode('utf-8')[:72], hashed_password.encode('utf-8')):
+            return False, None
+        return True, hash_password(plain_password)
+    
+    try:
+        password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False, None
+    
+    if password_hasher.check_needs_rehash(hashed_password):
+        return True, hash_password(plain_password)
+    return True, None
 
 
 def create_access_token(data: dict) -> str:
@@ -72,16 +170,43 @@ def create_access_token(data: dict) -> str:
     session_id = create_session(user_id=int(to_encode["sub"]), expires_days=ACCESS_TOKEN_EXPIRE_DAYS)
     to_encode["jti"] = session_id  # JWT ID for session tracking
     
-    expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode["exp"] = int(time.time()) + ACCESS_TOKEN_EXPIRE_DAYS * 86400
+    if ALGORITHM != "HS256":
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    
+    payload_b64 = base64.urlsafe_b64encode(orjson.dumps(to_encode)).rstrip(b"=")
+    signing_input = _JWT_HEADER_B64 + b"." + payload_b64
+    signature = hmac.new(_JWT_SIGNING_KEY, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + base64.urlsafe_b64encode(signature).rstrip(b"=")).decode()
+
+
+def decode_token(token: str) -> dict:
+    """Decode a JWT, reusing the cached payload of a recently verified token"""
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _jwt_cache_lock:
+        payload = _jwt_cache.get(key)
+    if payload is not None:
+        return payload
+    
+    # Cache miss: full signature verification (raises InvalidTokenError, so failures are never cached)
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    with _jwt_cache_lock:
+        _jwt_cache[key] = payload
+    return payload
+
+
+def evict_cached_auth(user_id: int) -> None:
+    """Drop all cached token payloads for a user, e.g. when all their sessions are revoked"""
+    subject = str(user_id)
+    with _jwt_cache_lock:
+        for key in [key for key, payload in _jwt_cache.items() if payload.get("sub") == subject]:
+            _jwt_cache.pop(key, None)
 
 
 def verify_token(token: str) -> dict:
     """Verify JWT token and validate session in DynamoDB"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         
         # Validate session in DynamoDB (check if not revoked)
         session_id = payload.get("jti")
@@ -93,9 +218,10 @@ def verify_token(token: str) -> dict:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        logger.info(f"[AUTH] Token verified, session: {session_id}")
+        # Lazy %-formatting: nothing is built unless DEBUG logging is enabled
+        logger.debug("[AUTH] Token verified, session: %s", session_id)
         return payload
-    except JWTError as e:
+    except InvalidTokenError as e:
         logger.error(f"[AUTH] Token verification failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -104,21 +230,128 @@ def verify_token(token: str) -> dict:
         )
 
 
+def load_user(db: Session, user_id: int) -> Optional[models.User]:
+    """Load a user by ID, attaching a cached snapshot to the session instead of querying when possible"""
+    with _user_cache_lock:
+        snapshot = _user_cache.get(user_id)
+    
+    if snapshot is not None:
+        # Rebuild a per-request instance and attach it as already persisted (no SELECT issued)
+        user = models.User(**snapshot)
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+    
+    user = db.get(models.User, user_id)
+    if user:
+        snapshot = {column.key: getattr(user, column.key) for column in models.User.__table__.columns}
+        with _user_cache_lock:
+            _user_cache[user_id] = snapshot
+    return user
+
+
+def evict_cached_user(user_id: int) -> None:
+    """Drop a user from the authentication cache after it has been modified or deleted"""
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+def get_user_by_username(username: str) -> Optional[models.User]:
+    """Fetch a user in a short-lived session so no pooled connection is held afterwards"""
+    with SessionLocal() as db:
+        return db.query(models.User).filter(models.User.username == username).first()
+
+
+def create_user(username: str, email: str, hashed_password: str, verification_token: str) -> models.User:
+    """
+    Insert a new user in a short-lived session. The user becomes an admin if it matches
+    FIRST_ADMIN_USERNAME while no admin exists yet or, when that is unset, if it is the
+    first user to register.
+    Raises a 400 HTTPException if the username or email is already registered.
+    """
+    with SessionLocal() as db:
+        if FIRST_ADMIN_USERNAME:
+            # Only bootstrap the first admin: once the name is freed (renamed or deleted account)
+            # registering it again must not grant admin
+            is_admin = (
+                username == FIRST_ADMIN_USERNAME
+                and db.query(models.User.id).filter(models.User.is_admin).limit(1).first() is None
+            )
+        else:
+            # Probe for any row instead of counting the table
+            is_admin = db.query(models.User.id).limit(1).first() is None
+        
+        db_user = models.User(
+            username=username,
+            email=email,
+            hashed_password=hashed_password,
+            is_admin=is_admin,
+            is_active=True,
+            email_verified=True,  # Auto-verified for mock
+            email_verification_token=verification_token
+        )
+        
+        # Username/email uniqueness is enforced by the database's unique indexes
+        db.add(db_user)
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            field = duplicate_user_field(e)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{field.capitalize()} already registered"
+            )
+        return db_user
+
+
+def update_password_hash(user_id: int, hashed_password: str) -> None:
+    """Store an upgraded password hash in a short-lived session"""
+    with SessionLocal() as db:
+        db.query(models.User).filter(models.User.id == user_id).update({"hashed_password": hashed_password})
+        db.commit()
+    evict_cached_user(user_id)
+
+
+def duplicate_user_field(error: IntegrityError) -> str:
+    """Return which unique users column ('username' or 'email') an insert collided with"""
+    diag = getattr(error.orig, "diag", None)
+    constraint = getattr(diag, "constraint_name", None) or str(error.orig)
+    return "email" if "email" in constraint else "username"
+
+
 # ============= MIDDLEWARE =============
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging all API requests"""
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        logger.info(f"Request: {request.method} {request.url.path}")
+class LoggingMiddleware:
+    """
+    Middleware for logging all API requests.
+    Implemented as plain ASGI rather than BaseHTTPMiddleware to avoid its
+    per-request task and stream wrapping.
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
+        # %-style arguments are only formatted if the record is actually emitted
+        logger.info("Request: %s %s", scope["method"], scope["path"],
+                    extra={"method": scope["method"], "path": scope["path"]})
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                process_time = time.perf_counter() - start_time
+                logger.info("Response: %s | Time: %.4fs", message["status"], process_time,
+                            extra={"status_code": message["status"], "duration": process_time})
+                MutableHeaders(scope=message).append("X-Process-Time", str(process_time))
+            await send(message)
         
         try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            logger.info(f"Response: {response.status_code} | Time: {process_time:.4f}s")
-            response.headers["X-Process-Time"] = str(process_time)
-            return response
+            await self.app(scope, receive, send_with_timing)
         except Exception as e:
-            logger.error(f"Error: {str(e)}")
+            logger.error("Error: %s", e)
             raise
 
 
@@ -138,6 +371,8 @@ class UserLogin(BaseModel):
 
 class UserResponse(BaseModel):
     """Model for user response"""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     username: str
     email: str
@@ -190,6 +425,9 @@ class UserInDB(BaseModel):
 # ============= TODO MODELS (VALIDATION) =============
 class TodoBase(BaseModel):
     """Base Pydantic model for Todo with validation"""
+    # Whitespace is stripped before length checks, so a blank title fails min_length
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
     title: str = Field(..., min_length=1, max_length=200, description="Todo title (required)")
     description: Optional[str] = Field(None, max_length=1000, description="Todo description (optional)")
     completed: bool = Field(default=False, description="Completion status")
@@ -199,12 +437,6 @@ class TodoBase(BaseModel):
     end_date: Optional[str] = Field(None, description="End date (YYYY-MM-DD)")
     category: str = Field(default='General', description="Category/tag for the todo")
 
-    @validator('title')
-    def title_must_not_be_empty(cls, v):
-        if not v or v.strip() == "":
-            raise ValueError('Title cannot be empty')
-        return v.strip()
-
 
 class TodoCreate(TodoBase):
     """Model for creating a new Todo"""
@@ -213,6 +445,8 @@ class TodoCreate(TodoBase):
 
 class TodoUpdate(BaseModel):
     """Model for updating a Todo - all fields optional"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
     title: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = Field(None, max_length=1000)
     completed: Optional[bool] = None
@@ -222,15 +456,11 @@ class TodoUpdate(BaseModel):
     end_date: Optional[str] = None
     category: Optional[str] = None
 
-    @validator('title')
-    def title_must_not_be_empty(cls, v):
-        if v is not None and (not v or v.strip() == ""):
-            raise ValueError('Title cannot be empty')
-        return v.strip() if v else v
-
 
 class TodoResponse(BaseModel):
     """Model for Todo response"""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     user_id: int
     title: str
@@ -245,6 +475,42 @@ class TodoResponse(BaseModel):
     updated_at: datetime
 
 
+# ============= QUERY COLUMNS =============
+# List endpoints select these columns as plain rows and serialize them straight to JSON with
+# orjson, skipping ORM hydration and per-row Pydantic validation of trusted database output.
+# response_model is still declared on those routes for the OpenAPI schema.
+
+# User columns exposed by UserResponse (never load the password hash or verification token for lists)
+USER_RESPONSE_COLUMNS = (
+    models.User.id,
+    models.User.username,
+    models.User.email,
+    models.User.is_admin,
+    models.User.is_active,
+    models.User.email_verified,
+    models.User.profile_picture,
+    models.User.created_at,
+)
+
+# Todo columns exposed by TodoResponse
+TODO_RESPONSE_COLUMNS = tuple(models.Todo.__table__.columns)
+
+
+# ============= RESPONSE SERIALIZATION =============
+# Single-object endpoints serialize ORM objects through adapters built once at import and
+# return the JSON bytes directly. FastAPI's response_model path would otherwise validate the
+# result in an extra threadpool hop (for sync endpoints), build a dict and then encode it.
+# response_model is still declared on those routes for the OpenAPI schema.
+user_adapter = TypeAdapter(UserResponse)
+todo_adapter = TypeAdapter(TodoResponse)
+
+
+def model_response(adapter: TypeAdapter, obj, status_code: int = 200) -> Response:
+    """Validate an ORM object with a prebuilt adapter and return it as a JSON response"""
+    content = adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+    return Response(content=content, status_code=status_code, media_type="application/json")
+
+
 # ============= DATABASE INITIALIZATION =============
 logger.info("Database connection configured")
 
@@ -255,7 +521,9 @@ app = FastAPI(
     description="Simple Todo API with CRUD operations, validation, logging, and auto-generated docs",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # Responses are serialized with orjson instead of the stdlib json module
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS for frontend integration
@@ -274,24 +542,75 @@ app.add_middleware(LoggingMiddleware)
 # ============= DATABASE STARTUP EVENT =============
 @app.on_event("startup")
 def startup_event():
-    """Initialize database tables on startup"""
-    models.Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created/verified")
+    """Initialize database tables, session TTL check, worker threadpool and OpenAPI schema on startup"""
+    init_db()
+    create_missing_indexes()
+    logger.info("Database tables and indexes created/verified")
+    
+    check_sessions_ttl()
+    
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    logger.info(f"Threadpool size set to {THREADPOOL_SIZE}")
+    
+    # Pydantic compiles the request/response models when the classes are defined, but FastAPI
+    # generates the OpenAPI schema lazily on the first /docs or /openapi.json hit; build it now
+    app.openapi()
+    logger.info("OpenAPI schema generated")
+
+
+# ============= AWS CONNECTION KEEP-ALIVE =============
+# Idle pooled connections to S3/DynamoDB are closed by AWS after a while, so the next request
+# pays a fresh TCP+TLS handshake; a cheap periodic call keeps them warm (0 disables it)
+AWS_KEEPALIVE_INTERVAL = int(os.getenv("AWS_KEEPALIVE_INTERVAL", "30"))
+_aws_keepalive_task: Optional[asyncio.Task] = None
+
+
+async def keep_aws_connections_warm():
+    """Ping DynamoDB and S3 every AWS_KEEPALIVE_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(AWS_KEEPALIVE_INTERVAL)
+        # The task is never awaited, so an escaping error would end it silently;
+        # CancelledError is not an Exception and still stops it on shutdown
+        try:
+            await run_in_threadpool(keep_dynamodb_connection_warm)
+            await run_in_threadpool(keep_s3_connection_warm)
+        except Exception:
+            logger.exception("AWS connection keep-alive failed")
+
+
+@app.on_event("startup")
+async def start_aws_keepalive():
+    """Start the AWS connection keep-alive task"""
+    global _aws_keepalive_task
+    if AWS_KEEPALIVE_INTERVAL > 0:
+        _aws_keepalive_task = asyncio.create_task(keep_aws_connections_warm())
+        logger.info(f"AWS connection keep-alive every {AWS_KEEPALIVE_INTERVAL}s")
+
+
+@app.on_event("shutdown")
+async def stop_aws_keepalive():
+    """Stop the AWS connection keep-alive task"""
+    if _aws_keepalive_task is not None:
+        _aws_keepalive_task.cancel()
 
 
 # ============= AUTHENTICATION DEPENDENCIES =============
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+def get_current_user(
+    request: Request,
+    token: str = Depends(security),
     db: Session = Depends(get_db)
 ) -> models.User:
-    """Get the current authenticated user from JWT token"""
+    """
+    Get the current authenticated user from JWT token.
+    Declared sync so FastAPI runs it in the threadpool: the session check (DynamoDB) and
+    user lookup (SQL) are blocking calls and must not run on the event loop.
+    The verified token payload is kept on request.state.jwt_payload for the endpoint.
+    """
     try:
-        token = credentials.credentials
-        logger.info(f"[AUTH] Validating token: {token[:20]}...")
         payload = verify_token(token)
+        request.state.jwt_payload = payload
         user_id_str = payload.get("sub")
         user_id: int = int(user_id_str) if user_id_str else None
-        logger.info(f"[AUTH] Token decoded, user_id: {user_id}")
         
         if user_id is None:
             logger.error("[AUTH] No user_id in token payload")
@@ -301,8 +620,8 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Query user from database
-        user = db.query(models.User).filter(models.User.id == user_id).first()
+        # Load user (cached for a short TTL to avoid a query per request)
+        user = load_user(db, user_id)
         
         if not user:
             logger.error(f"[AUTH] User {user_id} not found in database")
@@ -312,7 +631,7 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        logger.info(f"[AUTH] User authenticated: {user.username}")
+        logger.debug("[AUTH] User authenticated: %s", user.username)
         return user
     except HTTPException:
         raise
@@ -347,50 +666,23 @@ async def get_admin_user(current_user: models.User = Depends(get_current_active_
 # ============= AUTHENTICATION ENDPOINTS =============
 
 @app.post("/auth/register", response_model=TokenResponse, status_code=201, tags=["Authentication"])
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate):
     """
     Register a new user. 
     IMPORTANT: The first user to register automatically becomes an admin.
     """
-    # Check if username already exists
-    existing_user = db.query(models.User).filter(models.User.username == user_data.username).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # Check if email already exists
-    existing_email = db.query(models.User).filter(models.User.email == user_data.email).first()
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # First user becomes admin
-    user_count = db.query(models.User).count()
-    is_admin = user_count == 0
+    # Hash before touching the database so no pooled connection is held while hashing
+    # (hashing runs in the threadpool so it does not block the event loop)
+    hashed_pw = await run_in_threadpool(hash_password, user_data.password)
     
     # Generate mock verification token
     verification_token = secrets.token_urlsafe(32)
     
-    # Create user
-    hashed_pw = hash_password(user_data.password)
-    
-    db_user = models.User(
-        username=user_data.username,
-        email=user_data.email,
-        hashed_password=hashed_pw,
-        is_admin=is_admin,
-        is_active=True,
-        email_verified=True,  # Auto-verified for mock
-        email_verification_token=verification_token
+    # Create user; the blocking database work also runs in the threadpool
+    db_user = await run_in_threadpool(
+        create_user, user_data.username, user_data.email, hashed_pw, verification_token
     )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    is_admin = db_user.is_admin
     
     # Mock email verification log
     logger.info(f"[MOCK EMAIL] Verification link for {db_user.email}: /auth/verify-email/{verification_token}")
@@ -398,30 +690,20 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         logger.info(f"🎉 First user registered! {db_user.username} is now an ADMIN")
     
     # Create access token
-    access_token = create_access_token(data={"sub": db_user.id})
-    
-    # Prepare response
-    user_response = UserResponse(
-        id=db_user.id,
-        username=db_user.username,
-        email=db_user.email,
-        is_admin=db_user.is_admin,
-        is_active=db_user.is_active,
-        email_verified=db_user.email_verified,
-        profile_picture=db_user.profile_picture,
-        created_at=db_user.created_at
-    )
+    access_token = await run_in_threadpool(create_access_token, {"sub": db_user.id})
     
     logger.info(f"User registered: {db_user.username} (ID: {db_user.id}, Admin: {is_admin})")
     
-    return TokenResponse(access_token=access_token, user=user_response)
+    # The ORM user is converted by UserResponse (from_attributes) during validation
+    return TokenResponse(access_token=access_token, user=db_user)
 
 
 @app.post("/auth/login", response_model=TokenResponse, tags=["Authentication"])
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin):
     """Login with username and password to get JWT token"""
-    # Find user by username
-    user = db.query(models.User).filter(models.User.username == credentials.username).first()
+    # Find user by username; the session is closed before password verification so a
+    # burst of logins does not hold pooled connections for the duration of the hashing
+    user = await run_in_threadpool(get_user_by_username, credentials.username)
     
     if not user:
         raise HTTPException(
@@ -429,8 +711,9 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Incorrect username or password"
         )
     
-    # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    # Verify password (hashing runs in the threadpool so it does not block the event loop)
+    verified, new_hash = await run_in_threadpool(verify_password, credentials.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -443,44 +726,33 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
     
+    # Transparently upgrade legacy password hashes
+    if new_hash:
+        await run_in_threadpool(update_password_hash, user.id, new_hash)
+        logger.info(f"Password hash upgraded for user: {user.username}")
+    
     # Create access token
-    access_token = create_access_token(data={"sub": user.id})
-    
-    # Prepare response
-    user_response = UserResponse(
-        id=user.id,
-        username=user.username,
-        email=user.email,
-        is_admin=user.is_admin,
-        is_active=user.is_active,
-        email_verified=user.email_verified,
-        profile_picture=user.profile_picture,
-        created_at=user.created_at
-    )
+    access_token = await run_in_threadpool(create_access_token, {"sub": user.id})
     
     logger.info(f"User logged in: {user.username}")
     
-    return TokenResponse(access_token=access_token, user=user_response)
+    return TokenResponse(access_token=access_token, user=user)
 
 
 @app.post("/auth/logout", tags=["Authentication"])
 def logout(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    request: Request,
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Logout - invalidate current session.
     The JWT token will no longer be valid after this call.
     """
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        session_id = payload.get("jti")
-        if session_id:
-            invalidate_session(session_id)
-            logger.info(f"User {current_user.username} logged out, session: {session_id}")
-    except JWTError:
-        pass  # Token already invalid
+    # The token was already verified by the auth dependency; reuse its payload
+    session_id = request.state.jwt_payload.get("jti")
+    if session_id:
+        invalidate_session(session_id)
+        logger.info(f"User {current_user.username} logged out, session: {session_id}")
     
     return {"message": "Logged out successfully"}
 
@@ -492,57 +764,55 @@ def logout_all_sessions(current_user: models.User = Depends(get_current_active_u
     All JWT tokens for this user will be revoked.
     """
     count = invalidate_all_user_sessions(current_user.id)
+    evict_cached_auth(current_user.id)
     logger.info(f"User {current_user.username} logged out from all devices, {count} sessions invalidated")
     return {"message": f"Logged out from all devices. {count} session(s) invalidated."}
 
 
 @app.get("/auth/me", response_model=UserResponse, tags=["Authentication"])
-def get_me(current_user: models.User = Depends(get_current_active_user)):
+async def get_me(current_user: models.User = Depends(get_current_active_user)):
     """Get current user profile"""
-    return UserResponse(
-        id=current_user.id,
-        username=current_user.username,
-        email=current_user.email,
-        is_admin=current_user.is_admin,
-        is_active=current_user.is_active,
-        email_verified=current_user.email_verified,
-        profile_picture=current_user.profile_picture,
-        created_at=current_user.created_at
-    )
+    # No blocking I/O here (the user's columns are already loaded), so skip the threadpool hop
+    return model_response(user_adapter, current_user)
 
 
 @app.put("/auth/profile", response_model=UserResponse, tags=["Authentication"])
 def update_profile(
     profile_data: ProfileUpdate,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update current user's profile (username, email, profile picture)"""
-    # Check if new username is already taken by another user
-    if profile_data.username and profile_data.username != current_user.username:
-        existing_user = db.query(models.User).filter(
-            models.User.username == profile_data.username,
+    new_username = profile_data.username if profile_data.username != current_user.username else None
+    new_email = profile_data.email if profile_data.email != current_user.email else None
+    
+    # Check if the new username and/or email are taken by another user in a single query
+    conditions = []
+    if new_username:
+        conditions.append(models.User.username == new_username)
+    if new_email:
+        conditions.append(models.User.email == new_email)
+    if conditions:
+        taken = db.query(models.User.username, models.User.email).filter(
+            or_(*conditions),
             models.User.id != current_user.id
-        ).first()
-        if existing_user:
+        ).limit(2).all()
+        if any(row.username == new_username for row in taken):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
             )
-        current_user.username = profile_data.username
-    
-    # Check if new email is already taken by another user
-    if profile_data.email and profile_data.email != current_user.email:
-        existing_email = db.query(models.User).filter(
-            models.User.email == profile_data.email,
-            models.User.id != current_user.id
-        ).first()
-        if existing_email:
+        if taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already taken"
             )
-        current_user.email = profile_data.email
+    
+    if new_username:
+        current_user.username = new_username
+    if new_email:
+        current_user.email = new_email
     
     # Update profile picture if provided (S3 URL)
     if profile_data.profile_picture is not None:
@@ -555,29 +825,21 @@ def update_profile(
             # User is setting a new profile picture URL
             current_user.profile_picture = profile_data.profile_picture
         
-        # Delete old image from S3 if it existed and was from our bucket
+        # Delete old image from S3 if it existed and was from our bucket; this runs after the
+        # response is sent (and so only once the profile change is committed)
         if old_picture_url and old_picture_url != profile_data.profile_picture:
-            delete_profile_image(old_picture_url)
+            background_tasks.add_task(delete_profile_image, old_picture_url)
     
     db.commit()
-    db.refresh(current_user)
+    evict_cached_user(current_user.id)
     
     logger.info(f"User {current_user.username} updated their profile")
     
-    return UserResponse(
-        id=current_user.id,
-        username=current_user.username,
-        email=current_user.email,
-        is_admin=current_user.is_admin,
-        is_active=current_user.is_active,
-        email_verified=current_user.email_verified,
-        profile_picture=current_user.profile_picture,
-        created_at=current_user.created_at
-    )
+    return model_response(user_adapter, current_user)
 
 
 @app.post("/auth/profile/upload-url", response_model=UploadUrlResponse, tags=["Authentication"])
-def get_profile_upload_url(
+async def get_profile_upload_url(
     request: UploadUrlRequest,
     current_user: models.User = Depends(get_current_active_user)
 ):
@@ -599,7 +861,8 @@ def get_profile_upload_url(
         )
     
     try:
-        result = generate_presigned_upload_url(current_user.id, request.file_type)
+        # Every call gets a fresh object key, so an upload never overwrites a saved picture
+        result = await run_in_threadpool(generate_presigned_upload_url, current_user.id, request.file_type)
         logger.info(f"User {current_user.username} requested upload URL for profile picture")
         return UploadUrlResponse(**result)
     except ValueError as e:
@@ -615,20 +878,24 @@ def get_profile_upload_url(
         )
 
 
+# Static welcome payload, serialized once at import (the root is hit by load balancer health checks)
+ROOT_RESPONSE_BODY = orjson.dumps({
+    "message": "Welcome to Todo API",
+    "docs": "/docs",
+    "endpoints": {
+        "GET /todos": "Get all todos",
+        "GET /todos/{id}": "Get todo by ID",
+        "POST /todos": "Create new todo",
+        "PUT /todos/{id}": "Update todo",
+        "DELETE /todos/{id}": "Delete todo"
+    }
+})
+
+
 @app.get("/", tags=["Root"])
-def read_root():
+async def read_root():
     """Welcome endpoint"""
-    return {
-        "message": "Welcome to Todo API",
-        "docs": "/docs",
-        "endpoints": {
-            "GET /todos": "Get all todos",
-            "GET /todos/{id}": "Get todo by ID",
-            "POST /todos": "Create new todo",
-            "PUT /todos/{id}": "Update todo",
-            "DELETE /todos/{id}": "Delete todo"
-        }
-    }
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 
 @app.post("/todos", response_model=TodoResponse, status_code=201, tags=["Todos"])
@@ -652,10 +919,9 @@ def create_todo(
     
     db.add(db_todo)
     db.commit()
-    db.refresh(db_todo)
     
     logger.info(f"User {current_user.username} created todo: {db_todo.id}")
-    return db_todo
+    return model_response(todo_adapter, db_todo, status_code=201)
 
 
 @app.get("/todos", response_model=List[TodoResponse], tags=["Todos"])
@@ -665,17 +931,17 @@ def get_todos(
     db: Session = Depends(get_db)
 ):
     """Get all todos for the authenticated user with optional filtering"""
-    # Query user's todos
-    query = db.query(models.Todo).filter(models.Todo.user_id == current_user.id)
+    # Query user's todos as plain rows
+    query = select(*TODO_RESPONSE_COLUMNS).where(models.Todo.user_id == current_user.id)
     
     if completed is not None:
-        query = query.filter(models.Todo.completed == completed)
+        query = query.where(models.Todo.completed == completed)
     
     # Sort by created_at descending
-    todos = query.order_by(models.Todo.created_at.desc()).all()
+    todos = db.execute(query.order_by(models.Todo.created_at.desc())).mappings().all()
     
     logger.info(f"User {current_user.username} retrieved {len(todos)} todos")
-    return todos
+    return ORJSONResponse([dict(todo) for todo in todos])
 
 
 @app.get("/todos/{todo_id}", response_model=TodoResponse, tags=["Todos"])
@@ -695,7 +961,7 @@ def get_todo(
         raise HTTPException(status_code=404, detail="Todo not found")
     
     logger.info(f"User {current_user.username} retrieved todo: {todo_id}")
-    return todo
+    return model_response(todo_adapter, todo)
 
 
 @app.put("/todos/{todo_id}", response_model=TodoResponse, tags=["Todos"])
@@ -720,12 +986,12 @@ def update_todo(
     for field, value in update_data.items():
         setattr(todo, field, value)
     
-    todo.updated_at = datetime.utcnow()
+    # updated_at is set by the database (onupdate=func.now())
     db.commit()
     db.refresh(todo)
     
     logger.info(f"User {current_user.username} updated todo: {todo_id}")
-    return todo
+    return model_response(todo_adapter, todo)
 
 
 @app.delete("/todos/{todo_id}", tags=["Todos"])
@@ -757,11 +1023,11 @@ def get_stats(
     db: Session = Depends(get_db)
 ):
     """Get statistics about user's todos"""
-    total = db.query(models.Todo).filter(models.Todo.user_id == current_user.id).count()
-    completed = db.query(models.Todo).filter(
-        models.Todo.user_id == current_user.id,
-        models.Todo.completed == True
-    ).count()
+    # Single aggregate query instead of one COUNT per figure
+    total, completed = db.query(
+        func.count(models.Todo.id),
+        func.coalesce(func.sum(case((models.Todo.completed == True, 1), else_=0)), 0)
+    ).filter(models.Todo.user_id == current_user.id).one()
     pending = total - completed
     
     return {
@@ -776,28 +1042,22 @@ def get_stats(
 
 @app.get("/admin/users", response_model=List[UserResponse], tags=["Admin"])
 def get_all_users(
+    limit: int = Query(100, ge=1, le=500, description="Page size"),
+    offset: int = Query(0, ge=0, description="Number of users to skip"),
     admin: models.User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get all users (admin only)"""
-    users = db.query(models.User).all()
-    
-    users_response = [
-        UserResponse(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            is_admin=user.is_admin,
-            is_active=user.is_active,
-            email_verified=user.email_verified,
-            profile_picture=user.profile_picture,
-            created_at=user.created_at
-        )
-        for user in users
-    ]
+    """Get a page of users ordered by ID (admin only). The total is returned in X-Total-Count."""
+    users = db.execute(
+        select(*USER_RESPONSE_COLUMNS)
+        .order_by(models.User.id)
+        .offset(offset)
+        .limit(limit)
+    ).mappings().all()
+    total = db.query(func.count(models.User.id)).scalar()
     
-    logger.info(f"Admin {admin.username} retrieved all users")
-    return users_response
+    logger.info(f"Admin {admin.username} retrieved {len(users)} of {total} users")
+    return ORJSONResponse([dict(user) for user in users], headers={"X-Total-Count": str(total)})
 
 
 @app.get("/admin/users/{user_id}", response_model=UserResponse, tags=["Admin"])
@@ -807,21 +1067,12 @@ def get_user_by_id(
     db: Session = Depends(get_db)
 ):
     """Get a specific user by ID (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.get(models.User, user_id, options=[load_only(*USER_RESPONSE_COLUMNS)])
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return UserResponse(
-        id=user.id,
-        username=user.username,
-        email=user.email,
-        is_admin=user.is_admin,
-        is_active=user.is_active,
-        email_verified=user.email_verified,
-        profile_picture=user.profile_picture,
-        created_at=user.created_at
-    )
+    return model_response(user_adapter, user)
 
 
 @app.get("/admin/users/{user_id}/todos", response_model=List[TodoResponse], tags=["Admin"])
@@ -831,18 +1082,21 @@ def get_user_todos(
     db: Session = Depends(get_db)
 ):
     """Get all todos for a specific user (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    # Only the username is used (for logging)
+    user = db.get(models.User, user_id, options=[load_only(models.User.username)])
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    todos = db.query(models.Todo).filter(
-        models.Todo.user_id == user_id
-    ).order_by(models.Todo.created_at.desc()).all()
+    todos = db.execute(
+        select(*TODO_RESPONSE_COLUMNS)
+        .where(models.Todo.user_id == user_id)
+        .order_by(models.Todo.created_at.desc())
+    ).mappings().all()
     
     logger.info(f"Admin {admin.username} viewed todos for user {user.username}")
     
-    return todos
+    return ORJSONResponse([dict(todo) for todo in todos])
 
 
 @app.delete("/admin/users/{user_id}", tags=["Admin"])
@@ -852,7 +1106,7 @@ def delete_user(
     db: Session = Depends(get_db)
 ):
     """Delete a user and all their todos (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.get(models.User, user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -872,6 +1126,7 @@ def delete_user(
     # Delete user (cascade will delete todos)
     db.delete(user)
     db.commit()
+    evict_cached_user(user_id)
     
     logger.info(f"Admin {admin.username} deleted user {username} and {todo_count} todos")
     
@@ -890,7 +1145,7 @@ def toggle_admin_role(
     db: Session = Depends(get_db)
 ):
     """Toggle admin role for a user (admin only)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.get(models.User, user_id, options=[load_only(*USER_RESPONSE_COLUMNS)])
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -904,21 +1159,12 @@ def toggle_admin_role(
     
     user.is_admin = not user.is_admin
     db.commit()
-    db.refresh(user)
+    evict_cached_user(user_id)
     
     action = "granted" if user.is_admin else "revoked"
     logger.info(f"Admin {admin.username} {action} admin role for user {user.username}")
     
-    return UserResponse(
-        id=user.id,
-        username=user.username,
-        email=user.email,
-        is_admin=user.is_admin,
-        is_active=user.is_active,
-        email_verified=user.email_verified,
-        profile_picture=user.profile_picture,
-        created_at=user.created_at
-    )
+    return model_response(user_adapter, user)
 
 
 @app.get("/admin/stats", tags=["Admin"])
@@ -927,12 +1173,22 @@ def get_system_stats(
     db: Session = Depends(get_db)
 ):
     """Get system-wide statistics (admin only)"""
-    total_users = db.query(models.User).count()
-    admin_users = db.query(models.User).filter(models.User.is_admin == True).count()
-    active_users = db.query(models.User).filter(models.User.is_active == True).count()
-    
-    total_todos = db.query(models.Todo).count()
-    completed_todos = db.query(models.Todo).filter(models.Todo.completed == True).count()
+    # One aggregate query per table instead of one COUNT per figure; filtered counts
+    # (COUNT(*) FILTER (WHERE ...)) are never NULL, unlike SUM(CASE ...) on an empty table
+    total_users, admin_users, active_users = db.execute(
+        select(
+            func.count(),
+            func.count().filter(models.User.is_admin == True),
+            func.count().filter(models.User.is_active == True)
+        ).select_from(models.User)
+    ).one()
+    
+    total_todos, completed_todos = db.execute(
+        select(
+            func.count(),
+            func.count().filter(models.Todo.completed == True)
+        ).select_from(models.Todo)
+    ).one()
     
     return {
         "users": {
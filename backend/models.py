@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -37,7 +37,15 @@ class Todo(Base):
     end_date = Column(String, nullable=True)
     category = Column(String, default='General')
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # The database stamps updates itself; the Python default keeps inserts working on
+    # tables created before the server default existed
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=func.now())
     
     # Relationship to user
     owner = relationship("User", back_populates="todos")
+
+
+# Per-user todo listing (newest first) and the completed filter / stats counts
+# Built CONCURRENTLY on PostgreSQL so adding them to a populated table does not block writes
+Index("ix_todos_user_created", Todo.user_id, Todo.created_at.desc(), postgresql_concurrently=True)
+Index("ix_todos_user_completed", Todo.user_id, Todo.completed, postgresql_concurrently=True)
@@ -6,21 +6,73 @@ import boto3
 import os
 import uuid
 import logging
-from botocore.exceptions import ClientError
+from urllib.parse import unquote, urlparse
+from botocore.auth import S3SigV4QueryAuth
+from botocore.awsrequest import AWSRequest
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
 
 logger = logging.getLogger(__name__)
 
 # Configuration from environment
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+# Optional CloudFront distribution in front of the bucket (e.g. d1234abcd.cloudfront.net);
+# when set, profile images are served from the CDN instead of directly from S3
+CLOUDFRONT_DOMAIN = os.getenv("CLOUDFRONT_DOMAIN")
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "100"))
+PRESIGNED_URL_EXPIRES = 300  # Upload URLs are valid for 5 minutes
+
+# A single client is shared by every request so its HTTPS connection pool is reused
+# (boto3 clients are thread-safe; creating one per call re-resolves credentials and
+# pays a new TCP+TLS handshake)
+_boto_session = boto3.session.Session()
+_s3_client = _boto_session.client(
+    's3',
+    region_name=AWS_REGION,
+    config=Config(
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        signature_version='s3v4',
+        retries={'max_attempts': 3, 'mode': 'adaptive'},
+        tcp_keepalive=True,
+    ),
+)
 
 
 def get_s3_client():
     """
-    Create and return S3 client.
+    Return the shared S3 client.
     Uses IAM role credentials automatically when running on AWS infrastructure.
     """
-    return boto3.client('s3', region_name=AWS_REGION)
+    return _s3_client
+
+
+def presign_put_url(url: str, content_type: str) -> str:
+    """
+    Presign a PUT to the given object URL with SigV4 query authentication.
+    Signs the fixed put_object request directly instead of going through the client's
+    generate_presigned_url (operation model lookup, parameter serialization and event hooks).
+    """
+    # Resolved on each call (cached by the session once found, and refreshed automatically
+    # when they come from an IAM role) so credentials missing at import time are picked up later
+    credentials = _boto_session.get_credentials()
+    if credentials is None:
+        raise NoCredentialsError()
+    request = AWSRequest(method='PUT', url=url, headers={'Content-Type': content_type})
+    # Frozen credentials keep the key, secret and token consistent during signing
+    signer = S3SigV4QueryAuth(credentials.get_frozen_credentials(), 's3', AWS_REGION, expires=PRESIGNED_URL_EXPIRES)
+    signer.add_auth(request)
+    return request.url
+
+
+def keep_s3_connection_warm() -> None:
+    """Issue a cheap HeadBucket so a pooled S3 connection stays open between requests"""
+    if not S3_BUCKET_NAME:
+        return
+    try:
+        _s3_client.head_bucket(Bucket=S3_BUCKET_NAME)
+    except (BotoCoreError, ClientError) as e:
+        logger.warning(f"S3 keep-alive request failed: {e}")
 
 
 def generate_presigned_upload_url(user_id: int, file_type: str) -> dict:
@@ -35,7 +87,7 @@ def generate_presigned_upload_url(user_id: int, file_type: str) -> dict:
         dict with 'upload_url' (presigned URL) and 'file_url' (final accessible URL)
     
     Raises:
-        ClientError: If presigned URL generation fails
+        ClientError, BotoCoreError: If presigned URL generation fails
     """
     if not S3_BUCKET_NAME:
         raise ValueError("S3_BUCKET_NAME environment variable is not set")
@@ -45,25 +97,17 @@ def generate_presigned_upload_url(user_id: int, file_type: str) -> dict:
     if extension == 'jpeg':
         extension = 'jpg'
     
-    # Generate unique key for the file
+    # Generate unique key for the file. Keys are never reused: an overwritten object would keep
+    # its URL, so CloudFront would go on serving the old image until its cache TTL expired
     key = f"profile-pictures/{user_id}/{uuid.uuid4()}.{extension}"
     
     try:
-        s3_client = get_s3_client()
-        
-        # Generate presigned URL for PUT operation
-        presigned_url = s3_client.generate_presigned_url(
-            'put_object',
-            Params={
-                'Bucket': S3_BUCKET_NAME,
-                'Key': key,
-                'ContentType': file_type,
-            },
-            ExpiresIn=300  # URL valid for 5 minutes
-        )
+        # Generate presigned URL for PUT operation (uploads always go straight to S3)
+        s3_url = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
+        presigned_url = presign_put_url(s3_url, file_type)
         
         # Construct the final public URL where the image will be accessible
-        file_url = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
+        file_url = f"https://{CLOUDFRONT_DOMAIN}/{key}" if CLOUDFRONT_DOMAIN else s3_url
         
         logger.info(f"Generated presigned upload URL for user {user_id}, key: {key}")
         
@@ -72,7 +116,7 @@ def generate_presigned_upload_url(user_id: int, file_type: str) -> dict:
             "file_url": file_url
         }
         
-    except ClientError as e:
+    except (BotoCoreError, ClientError) as e:
         logger.error(f"Failed to generate presigned URL: {e}")
         raise
 
@@ -82,7 +126,7 @@ def delete_profile_image(image_url: str) -> bool:
     Delete a profile image from S3 by its URL.
     
     Args:
-        image_url: Full S3 URL of the image to delete
+        image_url: Full S3 or CloudFront URL of the image to delete
     
     Returns:
         True if deletion was successful, False otherwise
@@ -90,15 +134,18 @@ def delete_profile_image(image_url: str) -> bool:
     if not image_url or not S3_BUCKET_NAME:
         return False
     
-    # Only process URLs from our bucket
-    if S3_BUCKET_NAME not in image_url:
+    # Only process URLs from our bucket or its CloudFront distribution
+    # URL formats: https://bucket.s3.region.amazonaws.com/key, https://cdn-domain/key
+    parsed = urlparse(image_url)
+    from_bucket = parsed.netloc.startswith(f"{S3_BUCKET_NAME}.s3.")
+    from_cdn = bool(CLOUDFRONT_DOMAIN) and parsed.netloc == CLOUDFRONT_DOMAIN
+    if not (from_bucket or from_cdn):
         logger.warning(f"Attempted to delete image from unknown bucket: {image_url}")
         return False
     
     try:
-        # Extract the key from the URL
-        # URL format: https://bucket.s3.region.amazonaws.com/key
-        key = image_url.split('.amazonaws.com/')[-1]
+        # Extract the key from the URL path
+        key = unquote(parsed.path.lstrip('/'))
         
         s3_client = get_s3_client()
         s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=key)
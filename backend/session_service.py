@@ -6,22 +6,88 @@ Requires AWS DynamoDB table 'Sessions' with:
 - Partition key: session_id (String)
 - TTL attribute: expires_at
 - GSI: user_id-index (partition key: user_id)
+
+The GSI is sparse: revoking a session removes its user_id attribute, which
+drops the item from user_id-index, so per-user queries only read active sessions.
 """
 
 import boto3
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
 import uuid
 import logging
-from datetime import datetime, timedelta
-from boto3.dynamodb.conditions import Key
-from botocore.exceptions import ClientError
+from typing import Optional
+from datetime import datetime, timezone
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.config import Config
+from cachetools import TTLCache
+from botocore.exceptions import BotoCoreError, ClientError
 
 logger = logging.getLogger(__name__)
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-east-1'))
+# Initialize DynamoDB resource once per process; its client keeps a pool of
+# keep-alive HTTPS connections shared by all requests
+dynamodb = boto3.resource(
+    'dynamodb',
+    region_name=os.getenv('AWS_REGION', 'us-east-1'),
+    config=Config(
+        max_pool_connections=int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '100')),
+        retries={'max_attempts': 3, 'mode': 'adaptive'},
+        tcp_keepalive=True,
+    ),
+)
 sessions_table = dynamodb.Table(os.getenv('DYNAMODB_SESSIONS_TABLE', 'Sessions'))
 
+# Session IDs recently confirmed valid, mapped to their user ID, so most authenticated requests
+# skip the GetItem. Only positive results are cached, and invalidation through this process
+# evicts immediately; a session revoked by another instance can still be accepted here for up
+# to SESSION_CACHE_TTL_SECONDS (the revocation window).
+SESSION_CACHE_TTL_SECONDS = int(os.getenv('SESSION_CACHE_TTL_SECONDS', '15'))
+_session_cache = TTLCache(maxsize=50000, ttl=SESSION_CACHE_TTL_SECONDS)
+_session_cache_lock = threading.Lock()
+
+# DynamoDB limit per BatchWriteItem request
+BATCH_WRITE_SIZE = 25
+BATCH_MAX_RETRIES = 5
+# New session ids to try before giving up on (practically impossible) UUID collisions
+SESSION_ID_MAX_ATTEMPTS = 3
+# Concurrent BatchWriteItem calls when a user has more than 25 sessions to revoke
+BATCH_WRITE_WORKERS = 16
+
+
+def keep_dynamodb_connection_warm() -> None:
+    """Issue a cheap DescribeTable so a pooled DynamoDB connection stays open between requests"""
+    try:
+        dynamodb.meta.client.describe_table(TableName=sessions_table.name)
+    except (BotoCoreError, ClientError) as e:
+        logger.warning(f"DynamoDB keep-alive request failed: {e}")
+
+
+def check_sessions_ttl() -> bool:
+    """
+    Check that TTL is enabled on the sessions table so DynamoDB removes expired sessions.
+    Enable it with:
+    aws dynamodb update-time-to-live --table-name Sessions --time-to-live-specification "Enabled=true,AttributeName=expires_at"
+    
+    Returns:
+        True if TTL is enabled on expires_at
+    """
+    try:
+        response = dynamodb.meta.client.describe_time_to_live(TableName=sessions_table.name)
+        ttl = response.get('TimeToLiveDescription', {})
+        if ttl.get('TimeToLiveStatus') == 'ENABLED' and ttl.get('AttributeName') == 'expires_at':
+            return True
+        logger.warning(
+            f"TTL on expires_at is not enabled for table {sessions_table.name} "
+            f"(status: {ttl.get('TimeToLiveStatus', 'UNKNOWN')}); expired sessions will not be removed"
+        )
+        return False
+    except (BotoCoreError, ClientError) as e:
+        logger.warning(f"Could not check TTL on table {sessions_table.name}: {e}")
+        return False
+
 
 def create_session(user_id: int, expires_days: int = 7) -> str:
     """
@@ -35,27 +101,39 @@ def create_session(user_id: int, expires_days: int = 7) -> str:
     Returns:
         session_id: UUID string to be used as JWT jti
     """
-    session_id = str(uuid.uuid4())
-    expires_at = int((datetime.utcnow() + timedelta(days=expires_days)).timestamp())
+    now = datetime.now(timezone.utc)
+    # Integer epoch math; timestamp() on a naive utcnow() was read as local time
+    expires_at = int(now.timestamp()) + expires_days * 86400
     
-    try:
-        sessions_table.put_item(Item={
-            'session_id': session_id,
-            'user_id': str(user_id),
-            'created_at': datetime.utcnow().isoformat(),
-            'expires_at': expires_at,  # TTL - DynamoDB auto-deletes expired items
-            'is_valid': True
-        })
-        logger.info(f"Session created: {session_id} for user {user_id}")
-        return session_id
-    except ClientError as e:
-        logger.error(f"Failed to create session: {e}")
-        raise
+    for attempt in range(SESSION_ID_MAX_ATTEMPTS):
+        session_id = str(uuid.uuid4())
+        try:
+            # The condition guarantees a jti is never reused, in the same single write
+            sessions_table.put_item(
+                Item={
+                    'session_id': session_id,
+                    'user_id': str(user_id),
+                    'created_at': now.isoformat(),
+                    'expires_at': expires_at,  # TTL - DynamoDB auto-deletes expired items
+                    'is_valid': True
+                },
+                ConditionExpression='attribute_not_exists(session_id)'
+            )
+            logger.info(f"Session created: {session_id} for user {user_id}")
+            return session_id
+        except ClientError as e:
+            if (e.response['Error']['Code'] == 'ConditionalCheckFailedException'
+                    and attempt < SESSION_ID_MAX_ATTEMPTS - 1):
+                logger.warning(f"Session id collision on {session_id}, retrying")
+                continue
+            logger.error(f"Failed to create session: {e}")
+            raise
 
 
 def validate_session(session_id: str) -> bool:
     """
     Check if a session exists and is still valid.
+    Sessions confirmed valid within the last SESSION_CACHE_TTL_SECONDS are answered from memory.
     
     Args:
         session_id: The JWT jti claim to validate
@@ -63,6 +141,10 @@ def validate_session(session_id: str) -> bool:
     Returns:
         True if session is valid, False otherwise
     """
+    with _session_cache_lock:
+        if session_id in _session_cache:
+            return True
+    
     try:
         response = sessions_table.get_item(Key={'session_id': session_id})
         item = response.get('Item')
@@ -74,8 +156,16 @@ def validate_session(session_id: str) -> bool:
         is_valid = item.get('is_valid', False)
         if not is_valid:
             logger.warning(f"Session invalidated: {session_id}")
-            
-        return is_valid
+            return False
+        
+        # TTL deletion can lag expiry by up to 48 hours, so check it here too
+        if int(item.get('expires_at', 0)) < int(time.time()):
+            logger.warning(f"Session expired: {session_id}")
+            return False
+        
+        with _session_cache_lock:
+            _session_cache[session_id] = item.get('user_id')
+        return True
     except ClientError as e:
         logger.error(f"Failed to validate session: {e}")
         return False
@@ -94,14 +184,49 @@ def invalidate_session(session_id: str) -> bool:
     try:
         sessions_table.update_item(
             Key={'session_id': session_id},
-            UpdateExpression='SET is_valid = :val',
-            ExpressionAttributeValues={':val': False}
+            # Removing user_id takes the session out of the sparse user_id-index
+            UpdateExpression='SET is_valid = :val REMOVE user_id',
+            # Only write active sessions: no-op for revoked ones, and never create a stub item
+            ConditionExpression='is_valid = :true',
+            ExpressionAttributeValues={':val': False, ':true': True},
+            ReturnValues='NONE'
         )
         logger.info(f"Session invalidated: {session_id}")
         return True
     except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.info(f"Session already invalid or missing: {session_id}")
+            return True
         logger.error(f"Failed to invalidate session: {e}")
         return False
+    finally:
+        # Evict only once the write has finished, so a concurrent validate_session that read
+        # the still-valid item cannot leave the revoked session cached
+        with _session_cache_lock:
+            _session_cache.pop(session_id, None)
+
+
+def _query_active_sessions(user_id: int, projection: str):
+    """
+    Yield a user's active sessions from user_id-index, following LastEvaluatedKey
+    so results beyond the 1 MB Query page limit are not silently dropped.
+    """
+    query_kwargs = {
+        'IndexName': 'user_id-index',
+        'KeyConditionExpression': Key('user_id').eq(str(user_id)),
+        # Server-side filter for sessions revoked before the index became sparse (they still
+        # carry user_id) and for expired sessions that TTL has not deleted yet
+        'FilterExpression': Attr('is_valid').eq(True) & Attr('expires_at').gt(int(time.time())),
+        'ProjectionExpression': projection,
+    }
+    while True:
+        response = sessions_table.query(**query_kwargs)
+        yield from response.get('Items', [])
+        
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        query_kwargs['ExclusiveStartKey'] = last_key
 
 
 def invalidate_all_user_sessions(user_id: int) -> int:
@@ -115,51 +240,97 @@ def invalidate_all_user_sessions(user_id: int) -> int:
         Number of sessions invalidated
     """
     try:
-        response = sessions_table.query(
-            IndexName='user_id-index',
-            KeyConditionExpression=Key('user_id').eq(str(user_id))
-        )
+        session_ids = [item['session_id'] for item in _query_active_sessions(user_id, 'session_id')]
         
-        count = 0
-        for item in response.get('Items', []):
-            if item.get('is_valid', False):
-                invalidate_session(item['session_id'])
-                count += 1
-                
-        logger.info(f"Invalidated {count} sessions for user {user_id}")
+        # Revoked sessions are deleted in batches of 25 instead of one UpdateItem each;
+        # validate_session treats a missing session as invalid
+        batches = [session_ids[i:i + BATCH_WRITE_SIZE] for i in range(0, len(session_ids), BATCH_WRITE_SIZE)]
+        if len(batches) == 1:
+            count = _batch_delete_sessions(batches[0])
+        elif batches:
+            # Send the batches concurrently rather than one round trip after another
+            with ThreadPoolExecutor(max_workers=min(BATCH_WRITE_WORKERS, len(batches))) as executor:
+                count = sum(executor.map(_batch_delete_sessions, batches))
+        else:
+            count = 0
+
+        if count < len(session_ids):
+            logger.error(f"Invalidated only {count} of {len(session_ids)} sessions for user {user_id}")
+        else:
+            logger.info(f"Invalidated {count} sessions for user {user_id}")
         return count
     except ClientError as e:
         logger.error(f"Failed to invalidate user sessions: {e}")
         return 0
+    finally:
+        # As in invalidate_session, evict after the deletes so a concurrent check cannot re-cache them
+        _evict_cached_user_sessions(user_id)
 
 
-def get_user_sessions(user_id: int) -> list:
+def _evict_cached_user_sessions(user_id: int) -> None:
+    """Drop all of a user's sessions from the validity cache"""
+    owner = str(user_id)
+    with _session_cache_lock:
+        for session_id in [sid for sid, cached_owner in _session_cache.items() if cached_owner == owner]:
+            _session_cache.pop(session_id, None)
+
+
+def _batch_delete_sessions(session_ids: list) -> int:
     """
-    Get all active sessions for a user.
+    Delete up to 25 sessions with a single BatchWriteItem call,
+    retrying any unprocessed items with exponential backoff.
+    Calls the shared client directly, which (unlike the resource) is safe to use across threads.
+
+    Returns:
+        Number of sessions actually deleted
+    """
+    request_items = {
+        sessions_table.name: [
+            {'DeleteRequest': {'Key': {'session_id': session_id}}}
+            for session_id in session_ids
+        ]
+    }
+    try:
+        for attempt in range(BATCH_MAX_RETRIES):
+            response = dynamodb.meta.client.batch_write_item(RequestItems=request_items)
+            unprocessed = response.get('UnprocessedItems')
+            if not unprocessed:
+                return len(session_ids)
+            request_items = unprocessed
+            time.sleep(0.05 * 2 ** attempt)
+        logger.error("Some sessions were left unprocessed after retries")
+    except ClientError as e:
+        logger.error(f"Failed to delete sessions batch: {e}")
+
+    return len(session_ids) - len(request_items.get(sessions_table.name, []))
+
+
+def get_user_sessions(user_id: int, limit: Optional[int] = None) -> list:
+    """
+    Get a user's active sessions, most recent first.
     
     Args:
         user_id: The user's database ID
+        limit: Optional cap on the number of sessions returned (default: all). Every active
+               session is still read and sorted, so this does not reduce DynamoDB reads
         
     Returns:
         List of active session dictionaries
     """
     try:
-        response = sessions_table.query(
-            IndexName='user_id-index',
-            KeyConditionExpression=Key('user_id').eq(str(user_id))
-        )
-        
         active_sessions = [
             {
                 'session_id': item['session_id'],
                 'created_at': item.get('created_at'),
                 'expires_at': item.get('expires_at')
             }
-            for item in response.get('Items', [])
-            if item.get('is_valid', False)
+            for item in _query_active_sessions(user_id, 'session_id, created_at, expires_at')
         ]
         
-        return active_sessions
+        # user_id-index has no sort key, so order by the ISO-8601 created_at here; the sparse
+        # index keeps this to the user's active sessions only
+        active_sessions.sort(key=lambda session: session['created_at'] or '', reverse=True)
+        return active_sessions[:limit]
     except ClientError as e:
         logger.error(f"Failed to get user sessions: {e}")
         return []